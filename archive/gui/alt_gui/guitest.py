@@ -1,16 +1,34 @@
 import tkinter as tk
 import subprocess
+import os
 import re
+from functools import partial
+
+# Layer change entry format: "<layer>,<material>;"
+LAYER_LINE_RE = re.compile(r'^\d+,[a-zA-Z];\s*$')
 
 def run_script(script_name, light):
-    output = subprocess.check_output(["python3", script_name])
-    terminal_output.insert(tk.END, output)
-    light.configure(bg="green", relief=tk.SUNKEN)
+    # Run the script without blocking the Tk mainloop; output is drained from
+    # a non-blocking pipe on a short after() poll instead of check_output().
+    proc = subprocess.Popen(["python3", script_name], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    os.set_blocking(proc.stdout.fileno(), False)
+
+    def poll_output():
+        data = proc.stdout.read(4096)
+        if data:
+            terminal_output.configure(state='normal')
+            terminal_output.insert(tk.END, data.decode(errors="replace"))
+            terminal_output.configure(state='disabled')
+        if proc.poll() is None or data:
+            window.after(50, poll_output)
+        else:
+            light.configure(bg="green", relief=tk.SUNKEN)
+
+    window.after(50, poll_output)
 
 def save_input_text():
     user_input = input_entry.get()
-    pattern = r'^\d+,[a-zA-Z];\s*$'
-    if re.match(pattern, user_input):
+    if LAYER_LINE_RE.match(user_input):
         with open("layerlines.txt", "w") as file:
             file.write(user_input)
         input_entry.delete(0, tk.END)
@@ -44,7 +62,7 @@ for i, (button_text, script_name) in enumerate(button_data):
     light.grid(row=1, column=i, padx=10, pady=10)
     lights.append(light)
 
-    button = tk.Button(window, text=button_text, command=lambda script_name=script_name, light=light: run_script(script_name, light))
+    button = tk.Button(window, text=button_text, command=partial(run_script, script_name, light))
     button.grid(row=0, column=i, padx=10, pady=10)
 
 # Create the terminal output
@@ -65,8 +83,7 @@ tick_line = tick_box.create_line(5, 15, 10, 20, 20, 10, width=3, capstyle=tk.ROU
 tick_text = tick_box.create_text(25, 13, text="✓", font=("Arial", 16, "bold"), state=tk.HIDDEN)
 
 # Grid layout
-for i in range(len(button_data)):
-    window.grid_columnconfigure(i, weight=1)
+window.grid_columnconfigure(tuple(range(len(button_data))), weight=1)
 
 input_frame.grid(row=3, column=0, columnspan=len(button_data), padx=10, pady=10)
 input_label.grid(row=0, column=0)
@@ -1,20 +1,31 @@
+import errno
+import functools
 import socket
+import select
 import subprocess
 import time
 import argparse
 import tkinter as tk
 from tkinter import filedialog
-from PyQt5.QtWidgets import QApplication, QFileDialog
 from photonmmu_pump import run_stepper as pumps
 
+try:
+    from controller.logging_config import get_logger
+    log = get_logger('print_manager')
+except ImportError:
+    import logging
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    log = logging.getLogger('pollphoton')
+
 import RPi.GPIO as GPIO
 
-# Qt File Dialog Setup
+# Hidden Tk root used as the parent for the file dialog
+root = tk.Tk()
+root.withdraw()
+
+# File Dialog Setup
 def open_file_dialog():
-    app = QApplication([])
-    f_dialog = QFileDialog()
-    f_path = f_dialog.getOpenFileName()
-    return f_path[0]
+    return filedialog.askopenfilename(parent=root)
 
 
 # GPIO SET
@@ -26,11 +37,104 @@ GPIO.setup(led, GPIO.OUT)
 IP_ADDRESS = '192.168.4.2'
 PORT_NUMBER = 6000
 
-# create a socket object
-client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+def connect():
+    """Open a non-blocking connection to the printer bridge."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Send small status frames immediately and let the kernel detect dead peers
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Bound the connect so a wedged peer can't hang startup or reconnects
+    sock.settimeout(2.0)
+    sock.connect((IP_ADDRESS, PORT_NUMBER))
+    sock.setblocking(False)
+    return sock
+
+
+def reconnect():
+    """Rebuild the socket after the peer reset the connection."""
+    global client_socket
+    log.warning("Connection reset by peer retrying in %s seconds...", wait)
+    time.sleep(wait)
+    client_socket.close()
+    _recv_buffer.clear()
+    client_socket = connect()
+
+
+# Bytes received but not yet consumed as a complete record
+_recv_buffer = bytearray()
+
+# The uart-wifi protocol ends every reply with ",end"; replies carry no newline
+RECORD_END = b',end'
+
+
+def read_record(sock, timeout=1.0):
+    """Return the next ",end"-terminated response, or '' if none completes in time."""
+    deadline = time.monotonic() + timeout
+    while RECORD_END not in _recv_buffer:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not wait_readable(sock, remaining):
+            return ''
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionResetError(errno.ECONNRESET, "Connection closed by peer")
+        _recv_buffer.extend(chunk)
+    end = _recv_buffer.index(RECORD_END)
+    record = bytes(_recv_buffer[:end])
+    del _recv_buffer[:end + len(RECORD_END)]
+    return record.decode().strip()
+
+
+def with_reconnect(fn):
+    """Retry fn on a fresh socket whenever the peer resets the connection."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except socket.error as e:
+                if e.errno != errno.ECONNRESET:
+                    raise
+                reconnect()
+    return wrapper
+
+
+@with_reconnect
+def send(command, timeout=1.0):
+    """Send a command and discard its acknowledgement.
+
+    Reading the ack here keeps a later query() or wait_for_pause() from
+    taking it as the reply to its own command.
+    """
+    client_socket.sendall(command)
+    read_record(client_socket, timeout)
+
+
+@with_reconnect
+def query(command, timeout=1.0):
+    """Send a command and return the response, or '' if none arrives in time."""
+    client_socket.sendall(command)
+    return read_record(client_socket, timeout)
+
+
+def wait_readable(sock, timeout=0.25):
+    """Return True as soon as the socket has data, or False after timeout."""
+    return bool(select.select([sock], [], [], timeout)[0])
+
+
+def wait_for_pause(timeout=3.0):
+    """Poll status until the printer reports 'pause' instead of sleeping blind."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        fields = query(STATUS_BYTES, 0.25).split(',')
+        if len(fields) > 1 and fields[1] == 'pause':
+            return True
+    return False
+
+
+wait = 5
 
 # connect to the server
-client_socket.connect((IP_ADDRESS, PORT_NUMBER))
+client_socket = connect()
 
 # prompt the user to enter the script name and arguments
 p_name = 'gopause'
@@ -44,12 +148,13 @@ pause_command = setup_command + p_name
 resume_command = setup_command + r_name
 file_command = setup_command + f_name
 hacked_command = setup_command + 'getmode'
-# send the command to the server
-client_socket.send(status_command.encode())
-
-# receive the response from the server
-response = client_socket.recv(1024).decode()
-print(response)
+# Commands never change, so encode them once for the polling loop
+STATUS_BYTES = status_command.encode()
+PAUSE_BYTES = pause_command.encode()
+RESUME_BYTES = resume_command.encode()
+# send the command to the server and receive the response
+response = query(STATUS_BYTES)
+log.debug("Initial status: %s", response)
 data = response.split(',')
 #print('Received response: ', response)
 layernum_search = '15'
@@ -58,132 +163,84 @@ layernum_search = '15'
 # response = client_socket.recv(1024).decode()
 # print(response)
 
-# Create root window
-root = tk.Tk()
-root.withdraw()
-
 # open the file dialog box and get the path file
 file_path = open_file_dialog()
-layerlist = []
-# Open the file and read
+# Open the file and parse every "material,layer" token in a single pass
 with open(file_path, 'r') as f:
-    #layerfile = f.read()
-    for line in f:
-        layerlist.append(line.strip().split(':'))
-        print(layerlist)
-        newlist = [[item.split(',')[0], int(item.split(',')[1])] for sublist in layerlist for item in sublist]
+    newlist = [[pair[0], int(pair[1])]
+               for line in f
+               for token in line.strip().split(':') if token
+               for pair in (token.split(','),)]
 
-
-print(layerlist)
-print (newlist)
+log.info("Layer changes: %s", newlist)
+n_changes = len(newlist)
 start_index = 0
 
-max_retries = 10
-wait = 5
-while True:
-    try:
-        client_socket.send(status_command.encode())
-        # receive the response from the server
-        response = client_socket.recv(1024).decode()
-        # print(response)
-        data = response.split(',')
-        #print(data[1])
-        #print("Current Layer: ",data[15])
-        print("Next Layer Change: ", newlist)
-        if (data[1] == 'pause'):
-            client_socket.sendall(resume_command.encode())
-        elif (data[1] == 'ERROR1'):
-            time.sleep(3)
-        elif (data[1] == 'stop\r\n'):
-            time.sleep(5)
-
-    except IndexError:
-        print('All changes completed... Printing Normally')
-        break
-    except socket.error as e:
-        if e.errno == 104:
-            print(f"Connection reset by peer retrying in {wait} seconds...")
-            time.sleep(wait)
-            # create a socket object
-            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-            # connect to the server
-            client_socket.connect((IP_ADDRESS, PORT_NUMBER))
-        else: 
-            raise
 
-    try:
+
+def handle_state(state):
+    """React to the printer's reported state before checking layers."""
+    if state == 'pause':
+        send(RESUME_BYTES)
+    elif state == 'ERROR1':
         time.sleep(3)
-        client_socket.sendall(status_command.encode())
-        response = client_socket.recv(1024).decode()
-        newdata = response.split(',')
-        try:
-                converted_layer = int(newdata[5])
-        except ValueError:
-                print(f"Could not convert '{converted_layer}' to an integer")
-                continue
-        print("Searching...")
-        print("start index: ",start_index)
-        print("layerlist: ",(newlist))
-        print("layerchange num", (newlist[start_index][1]))
-        print("Current Layer", (converted_layer))
-        print("lenlist",len(newlist))
-        
-        if start_index<len(newlist):
-            if newlist[start_index][1] == converted_layer:
-                print("FOUND")
-                
-                client_socket.sendall(pause_command.encode())
-                time.sleep(3)
-                GPIO.output(led, GPIO.HIGH)
-                
-                #print("GPIO: ",GPIO.input(led))\
-                
-                print("Draining Material... Please Wait")
-                #pumps('D', 'R', 250)
-                pumps('D', 'F', 10)
-                GPIO.output(led, GPIO.LOW)
-                print("GPIO: ", GPIO.input(led))
-                print("Done Drain")
-                print("Changing Material... Please Wait")
-                #pumps(newlist[start_index][0], 'F', 225)
-                pumps(newlist[start_index][0], 'F', 10)
-                time.sleep(10)
-                try:
-                        client_socket.sendall(resume_command.encode())
-                except socket.error as e:
-                        if e.errno == 104:
-                            print(f"Connection reset by peer retrying in {wait} seconds...")
-                            time.sleep(wait)
-                            # create a socket object
-                            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-                            # connect to the server
-                            client_socket.connect((IP_ADDRESS, PORT_NUMBER))                
-                print("Changed... Resuming Print")
-                start_index += 1
-        else:
-                sys.exit()
-    except IndexError:
-        print('App interference')
-        print(newdata)
-        pass
-    except socket.error as e:
-        if e.errno == 104:
-            print(f"Connection reset by peer retrying in {wait} seconds...")
-            time.sleep(wait)
-            # create a socket object
-            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-            # connect to the server
-            client_socket.connect((IP_ADDRESS, PORT_NUMBER))
-        else:
-            raise
-
-    time.sleep(3)
-
-    #client_socket.sendall(status_command.encode())
-    #print("are you blocking me")
+    elif state == 'stop':
+        time.sleep(5)
+
+
+def handle_layer(layer):
+    """Run the next material change if layer matches; False once all are done."""
+    global start_index
+    if start_index >= n_changes:
+        return False
+
+    material, change_layer = newlist[start_index]
+    log.debug("Searching... start index: %s, layerchange num %s, Current Layer %s",
+              start_index, change_layer, layer)
+    if change_layer != layer:
+        return True
+
+    log.info("FOUND layer %s", layer)
+    send(PAUSE_BYTES)
+    wait_for_pause()
+    GPIO.output(led, GPIO.HIGH)
+
+    log.info("Draining Material... Please Wait")
+    #pumps('D', 'R', 250)
+    pumps('D', 'F', 10)
+    GPIO.output(led, GPIO.LOW)
+    log.debug("GPIO: %s", GPIO.input(led))
+    log.info("Done Drain")
+    log.info("Changing Material... Please Wait")
+    #pumps(material, 'F', 225)
+    pumps(material, 'F', 10)
+    time.sleep(10)
+    send(RESUME_BYTES)
+    log.info("Changed... Resuming Print")
+    start_index += 1
+    return True
+
+
+while True:
+    # One status query per iteration drives both the state and layer checks
+    response = query(STATUS_BYTES)
+    if not response:
+        continue
+    fields = response.split(',')
+    try:
+        handle_state(fields[1])
+        layer = int(fields[5])
+    except (IndexError, ValueError):
+        log.debug("bad status row %r", fields)
+    else:
+        if not handle_layer(layer):
+            log.info('All changes completed... Printing Normally')
+            break
+
+    # Wake early if the printer pushes data, otherwise poll again after ~3 s
+    for _ in range(12):
+        if wait_readable(client_socket):
+            break
 
 # close the socket
 client_socket.close()
@@ -1,6 +1,13 @@
+import os
+import re
 from setuptools import setup, find_packages
 from pathlib import Path
 
+def load_version():
+    init_file = Path(__file__).parent / 'src' / 'controller' / '__init__.py'
+    match = re.search(r"^__version__\s*=\s*['\"]([^'\"]+)['\"]", init_file.read_text(), re.M)
+    return match.group(1) if match else '0.0.0'
+
 def load_requirements():
     req_file = Path(__file__).parent / 'requirements.txt'
     if not req_file.exists():
@@ -13,13 +20,26 @@ def load_requirements():
         lines.append(line)
     return lines
 
+def load_ext_modules():
+    # Opt-in: MMU_MYPYC=1 pip install . compiles the pump control path with mypyc
+    if os.environ.get('MMU_MYPYC') != '1':
+        return []
+    from mypyc.build import mypycify
+    # The Pi hardware libraries ship no type stubs and the other controller
+    # modules are not compiled, so only mmu_control itself is type-checked
+    # src/ has its own __init__.py; name the module from the package_dir root
+    os.environ['MYPYPATH'] = 'src'
+    return mypycify(['--explicit-package-bases', '--ignore-missing-imports',
+                     '--follow-imports=silent', 'src/controller/mmu_control.py'])
+
 setup(
     name='scion-mmu-controller',
-    version='0.2.0',
+    version=load_version(),
     description='Scion Multi-Material Printer Controller',
     author='Scion Research',
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
     install_requires=load_requirements(),
+    ext_modules=load_ext_modules(),
     python_requires='>=3.8',
 )
@@ -4,6 +4,10 @@ import subprocess
 import re
 import signal
 import threading
+from functools import partial
+
+# Layer change entry format: "<layer>,<material>;"
+LAYER_LINE_RE = re.compile(r'^\d+,[a-zA-Z];\s*$')
 
 # Global variables
 running_process = None
@@ -44,8 +48,7 @@ def interrupt_scripts():
 # Function to save input text
 def save_input_text():
     user_input = input_entry.get()
-    pattern = r'^\d+,[a-zA-Z];\s*$'
-    if re.match(pattern, user_input):
+    if LAYER_LINE_RE.match(user_input):
         with open("layerlines.txt", "w") as file:
             file.write(user_input)
         input_entry.delete(0, tk.END)
@@ -81,13 +84,13 @@ for i, (button_text, script_name) in enumerate(button_data):
     light = tk.Button(
         window,
         text=button_text,
-        command=lambda script_name=script_name, light=light: run_script(script_name, light),
         width=light_size,
         height=light_size,
         relief=tk.FLAT,
         bg="red",
         activebackground="red"
     )
+    light.configure(command=partial(run_script, script_name, light))
     light.grid(row=1, column=i, padx=10, pady=10)
     lights.append(light)
     
@@ -122,8 +125,7 @@ interrupt_button = tk.Button(window, text="Interrupt", command=interrupt_scripts
 interrupt_button.grid(row=4, column=0, columnspan=len(button_data), padx=10, pady=10)
 
 # Configure row and column weights
-for i in range(len(button_data)):
-    window.grid_columnconfigure(i, weight=1)
+window.grid_columnconfigure(tuple(range(len(button_data))), weight=1)
 window.grid_rowconfigure(2, weight=1)
 
 # Start the main loop
@@ -4,7 +4,7 @@
 import argparse
 import sys
 import time
-from typing import Iterable
+from typing import Dict, Iterable, Tuple
 
 from uart_wifi.communication import UartWifi
 from uart_wifi.errors import ConnectionException
@@ -58,17 +58,24 @@ args:
 
 PORT = 6000
 
+# One UartWifi per printer, reused across commands until it fails
+_UART_POOL: Dict[Tuple[str, int], UartWifi] = {}
+
 def send_command(ip_address: str, port: int, command: str, use_raw: bool) -> Iterable[MonoXResponseType]:
-    # Try 3 times to get the data.
+    # Try 3 times to get the data, backing off 0.1s, then 0.3s between attempts.
+    key = (ip_address, port)
     for attempt in range(3):
         try:
-            uart = UartWifi(ip_address, port)
-            if use_raw:
-                uart.raw = True
+            uart = _UART_POOL.get(key)
+            if uart is None:
+                uart = _UART_POOL[key] = UartWifi(ip_address, port)
+            uart.raw = use_raw
             return uart.send_request(command)
         except ConnectionException:
-            time.sleep(1) # You may want to adjust the sleep time based on your requirements.
-            continue
+            # Drop the failed connection so the next attempt starts fresh
+            _UART_POOL.pop(key, None)
+            if attempt < 2:
+                time.sleep(0.1 * (3 ** attempt))
     raise ConnectionException(f"Failed to send command after 3 attempts.")
 
 def parse_args():
@@ -21,11 +21,17 @@ Usage:
     set_log_level('mmu_control', 'DEBUG')
 """
 
+import atexit
 import logging
 import logging.handlers
 import json
+import queue
 import os
 import sys
+import traceback
+from collections import deque
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional, Union
@@ -59,14 +65,28 @@ _LOG_CONFIG = {
 _LOGGERS: Dict[str, logging.Logger] = {}
 _WEB_LOG_HANDLER = None
 
+# Loggers enqueue records for the web handler; a single listener thread drains
+# the queue so formatting and callbacks stay off the callers' threads
+_LOG_QUEUE: queue.Queue = queue.Queue(-1)
+_QUEUE_HANDLER = logging.handlers.QueueHandler(_LOG_QUEUE)
+_QUEUE_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+# mtime of the last logging_config.json that was merged into _LOG_CONFIG
+_CONFIG_CACHE = {'mtime': 0.0}
+
+# Effective settings each logger was last built with, and shared formatters
+_LAST_CONFIG: Dict[str, tuple] = {}
+_FORMATTERS: Dict[str, logging.Formatter] = {}
+
 class WebSocketLogHandler(logging.Handler):
     """Custom log handler that can send logs to web interface via callback"""
 
     def __init__(self, callback=None):
         super().__init__()
         self.callback = callback
-        self.log_buffer = []
         self.max_buffer_size = 1000
+        # Bounded deque evicts the oldest entry in O(1) once full
+        self.log_buffer = deque(maxlen=self.max_buffer_size)
 
     def emit(self, record):
         try:
@@ -80,10 +100,6 @@ class WebSocketLogHandler(logging.Handler):
                 'message': msg
             })
 
-            # Trim buffer if needed
-            if len(self.log_buffer) > self.max_buffer_size:
-                self.log_buffer.pop(0)
-
             # Send to web interface if callback available
             if self.callback:
                 self.callback(record.levelname.lower(), msg)
@@ -93,7 +109,7 @@ class WebSocketLogHandler(logging.Handler):
 
     def get_recent_logs(self, count=100):
         """Get recent log entries for web interface"""
-        return self.log_buffer[-count:]
+        return list(islice(self.log_buffer, max(0, len(self.log_buffer) - count), None))
 
     def set_callback(self, callback):
         """Set callback function for real-time log streaming"""
@@ -107,9 +123,14 @@ def load_config():
         # Try to load from config directory
         config_path = get_config_dir() / 'logging_config.json'
         if config_path.exists():
+            # Skip the re-parse if the file hasn't changed since last load
+            mtime = config_path.stat().st_mtime
+            if mtime == _CONFIG_CACHE['mtime']:
+                return
             with open(config_path, 'r') as f:
                 stored_config = json.load(f)
                 _LOG_CONFIG.update(stored_config)
+                _CONFIG_CACHE['mtime'] = mtime
                 print(f"Loaded logging config from {config_path}")
     except Exception as e:
         print(f"Could not load logging config: {e}, using defaults")
@@ -122,12 +143,14 @@ def save_config():
 
         with open(config_path, 'w') as f:
             json.dump(_LOG_CONFIG, f, indent=2)
+        _CONFIG_CACHE['mtime'] = 0.0
 
     except Exception as e:
         print(f"Could not save logging config: {e}")
 
+@lru_cache(maxsize=1)
 def get_config_dir():
-    """Get configuration directory path"""
+    """Get configuration directory path (resolved once per process)"""
     # Try to find config directory relative to this file
     current_dir = Path(__file__).parent
 
@@ -142,6 +165,14 @@ def get_config_dir():
     config_dir.mkdir(exist_ok=True)
     return config_dir
 
+def _get_formatter(kind: str) -> logging.Formatter:
+    """Get a shared Formatter for 'console', 'file' or 'web' output"""
+    fmt = _LOG_CONFIG['format'][kind]
+    formatter = _FORMATTERS.get(fmt)
+    if formatter is None:
+        formatter = _FORMATTERS[fmt] = logging.Formatter(fmt)
+    return formatter
+
 def setup_logging(component_name: str, level: Optional[str] = None,
                  console: Optional[bool] = None,
                  file_output: Optional[bool] = None) -> logging.Logger:
@@ -157,26 +188,33 @@ def setup_logging(component_name: str, level: Optional[str] = None,
     Returns:
         Configured logger instance
     """
-    global _WEB_LOG_HANDLER
+    global _WEB_LOG_HANDLER, _QUEUE_LISTENER
 
     # Load configuration if not already done
     if not _LOG_CONFIG.get('_loaded'):
         load_config()
         _LOG_CONFIG['_loaded'] = True
 
+    log_level = level or _LOG_CONFIG['levels'].get(component_name, 'INFO')
+
+    # Nothing to rebuild if this logger already has handlers for these settings
+    config_key = (log_level.upper(), console, file_output,
+                  dict(_LOG_CONFIG['outputs']), dict(_LOG_CONFIG['format']),
+                  dict(_LOG_CONFIG['file_config']))
+    if component_name in _LOGGERS and _LAST_CONFIG.get(component_name) == config_key:
+        return _LOGGERS[component_name]
+
     # Create logger
     logger = logging.getLogger(component_name)
     logger.handlers.clear()  # Remove any existing handlers
 
     # Set log level
-    log_level = level or _LOG_CONFIG['levels'].get(component_name, 'INFO')
     logger.setLevel(getattr(logging, log_level.upper()))
 
     # Console handler
     if console is not False and _LOG_CONFIG['outputs']['console']:
         console_handler = logging.StreamHandler(sys.stdout)
-        console_format = logging.Formatter(_LOG_CONFIG['format']['console'])
-        console_handler.setFormatter(console_format)
+        console_handler.setFormatter(_get_formatter('console'))
         logger.addHandler(console_handler)
 
     # File handler
@@ -192,8 +230,7 @@ def setup_logging(component_name: str, level: Optional[str] = None,
             file_handler = logging.handlers.RotatingFileHandler(
                 log_file, maxBytes=max_size, backupCount=backup_count
             )
-            file_format = logging.Formatter(_LOG_CONFIG['format']['file'])
-            file_handler.setFormatter(file_format)
+            file_handler.setFormatter(_get_formatter('file'))
             logger.addHandler(file_handler)
 
         except Exception as e:
@@ -203,13 +240,20 @@ def setup_logging(component_name: str, level: Optional[str] = None,
     if _LOG_CONFIG['outputs']['web_stream']:
         if _WEB_LOG_HANDLER is None:
             _WEB_LOG_HANDLER = WebSocketLogHandler()
-            web_format = logging.Formatter(_LOG_CONFIG['format']['web'])
-            _WEB_LOG_HANDLER.setFormatter(web_format)
+        _WEB_LOG_HANDLER.setFormatter(_get_formatter('web'))
+
+        if _QUEUE_LISTENER is None:
+            _QUEUE_LISTENER = logging.handlers.QueueListener(
+                _LOG_QUEUE, _WEB_LOG_HANDLER, respect_handler_level=True
+            )
+            _QUEUE_LISTENER.start()
+            atexit.register(_QUEUE_LISTENER.stop)
 
-        logger.addHandler(_WEB_LOG_HANDLER)
+        logger.addHandler(_QUEUE_HANDLER)
 
     # Store logger reference
     _LOGGERS[component_name] = logger
+    _LAST_CONFIG[component_name] = config_key
 
     logger.info(f"Logging initialized for {component_name} (level: {log_level})")
     return logger
@@ -259,23 +303,29 @@ def get_logging_config():
     return _LOG_CONFIG.copy()
 
 # Convenience functions for common log patterns
+class _ParamList:
+    """Renders kwargs as 'k=v, ...' only when a handler formats the record"""
+    __slots__ = ('kwargs',)
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return ', '.join(f'{k}={v}' for k, v in self.kwargs.items())
+
 def log_function_entry(logger, func_name, **kwargs):
     """Log function entry with parameters"""
-    if logger.isEnabledFor(logging.DEBUG):
-        params = ', '.join(f'{k}={v}' for k, v in kwargs.items())
-        logger.debug(f"→ {func_name}({params})")
+    logger.debug("→ %s(%s)", func_name, _ParamList(kwargs))
 
 def log_function_exit(logger, func_name, result=None):
     """Log function exit with result"""
-    if logger.isEnabledFor(logging.DEBUG):
-        if result is not None:
-            logger.debug(f"← {func_name} → {result}")
-        else:
-            logger.debug(f"← {func_name}")
+    if result is not None:
+        logger.debug("← %s → %s", func_name, result)
+    else:
+        logger.debug("← %s", func_name)
 
 def log_error_with_traceback(logger, error, context=""):
     """Log error with full traceback information"""
-    import traceback
     logger.error(f"{context}Error: {error}")
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"Traceback:\n{traceback.format_exc()}")
@@ -3,22 +3,32 @@ Photon MMU Pump Control - Low-level stepper motor control for material pumps
 
 Direct hardware control for stepper motor-driven pumps via Adafruit motor controllers.
 Interfaces with two MotorKit boards (I2C addresses 0x60, 0x61) to control four pumps:
-- STEPPER_A/B: Material pumps A/B (kit.stepper1/2)
-- STEPPER_C/D: Material pump C/Drain pump (kit2.stepper1/2)
+- Pumps A/B: Material pumps A/B (kit.stepper1/2)
+- Pumps C/D: Material pump C/Drain pump (kit2.stepper1/2)
 
 Key Functions:
 - run_stepper(): Primary pump control with timing
-- initialize_motors(): Release motors to safe state
+- run_stepper_async(): Same, on a background thread, returning a Future
+- initialize_motors(): Open the motor boards and release motors to safe state
 - read_sensor(): Material level detection via GPIO 18
 
 Requires: I2C enabled, Adafruit MotorKit boards, proper power supply
 """
 
-import RPi.GPIO as GPIO
+import board
+import busio
 from adafruit_motorkit import MotorKit
 from adafruit_motor import stepper
+import json
+import struct
+import threading
 import time
+import warnings
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
 
 # Set up logger for pump operations
 logger = logging.getLogger(__name__)
@@ -32,202 +42,370 @@ SERIESRESISTOR = 560
 # PIN OF SENSOR
 SENSORPIN = 18
 
-def read_sensor():
-    """
-    Read analog sensor for material level detection.
-    
-    Returns:
-        float: Sensor resistance in ohms (higher = lower level)
-    """
+# The Pi has no ADC, so SENSORPIN reads only 0 or 1. Resistance for each level
+# from the original 10-bit formula SERIESRESISTOR / (1023 / reading - 1);
+# level 0 used to raise ZeroDivisionError. A real analog reading needs an
+# external ADC (e.g. MCP3008 over SPI).
+_SENSOR_LUT = (float('inf'), SERIESRESISTOR / (1023 / 1 - 1))
+
+# RPi.GPIO, imported and configured on the first read_sensor() call so
+# pump-only users never load it; only set once the pin setup has succeeded
+_GPIO = None
+
+# Whether the edge callback keeps _last_level current; otherwise each
+# read_sensor() call polls the pin
+_edge_detect = False
+
+# Last sensor level, kept current by the edge callback instead of polling
+_last_level = None
+
+def _on_sensor_edge(gpio, channel):
+    global _last_level
+    _last_level = gpio.input(channel)
+
+def _setup_sensor():
+    """Configure the sensor pin once and start tracking its level."""
+    global _GPIO, _edge_detect, _last_level
+    import RPi.GPIO as GPIO
     GPIO.setmode(GPIO.BCM)
-    # set up the GPIO pin as an analog input
     GPIO.setup(SENSORPIN, GPIO.IN)
+    _last_level = GPIO.input(SENSORPIN)
+    try:
+        GPIO.add_event_detect(SENSORPIN, GPIO.BOTH, callback=partial(_on_sensor_edge, GPIO), bouncetime=5)
+        _edge_detect = True
+    except RuntimeError as e:
+        logger.warning("[SENSOR] Edge detection unavailable on pin %s (%s), polling instead", SENSORPIN, e)
+    _GPIO = GPIO
+
+def read_sensor():
+    """
+    Read the material level sensor.
 
-    # read the analog value from the sensor
-    reading = GPIO.input(SENSORPIN)
+    Returns the level cached by the edge callback rather than reading the pin,
+    unless edge detection could not be set up; the first call sets up the
+    GPIO pin.
 
-    # calculate the resistance of the sensor
-    reading = (1023 / reading) - 1
-    reading = SERIESRESISTOR / reading
+    Returns:
+        float: Sensor resistance in ohms (higher = lower level); inf when
+            the pin reads low
+    """
+    if _GPIO is None:
+        _setup_sensor()
 
-    return reading
+    if not _edge_detect:
+        return _SENSOR_LUT[_GPIO.input(SENSORPIN)]
+    return _SENSOR_LUT[_last_level]
     
 
-# Initialize the motor kit with I2C verification
-try:
-    logger.info("[I2C] Initializing MotorKit at default address 0x60...")
-    kit = MotorKit()
-    logger.info("[I2C] ✓ MotorKit 0x60 initialized successfully")
+# Repository config/pump_profiles.json, used when no config_path is given
+_DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / 'config' / 'pump_profiles.json'
 
-    # Verify I2C communication by reading PCA9685 registers
+def _load_i2c_frequency(config_path=None, default=400_000):
+    """Read the motor board I2C clock from pump_profiles.json (i2c.frequency_hz)."""
+    config_path = Path(config_path) if config_path else _DEFAULT_CONFIG_PATH
+    try:
+        with open(config_path, 'r') as f:
+            return int(json.load(f).get('i2c', {}).get('frequency_hz', default))
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning("[I2C] Could not read I2C frequency from %s, using %sHz: %s", config_path, default, e)
+        return default
+
+def _log_pca_registers(addr, pca):
+    """Log a PCA9685's PWM frequency, derived from a single PRESCALE register read."""
     try:
-        freq = kit._pca.frequency
-        prescale = kit._pca.prescale_reg
-        logger.info(f"[I2C] Controller 0x60 - PWM freq: {freq}Hz, prescale: {prescale}")
+        # pca.frequency would read PRESCALE again just to do this division
+        prescale = pca.prescale_reg
+        freq = pca.reference_clock_speed / 4096 / (prescale + 1)
+        logger.info("[I2C] Controller %s - PWM freq: %.0fHz, prescale: %s", addr, freq, prescale)
     except Exception as e:
-        logger.warning(f"[I2C] Could not read controller 0x60 registers: {e}")
+        logger.warning("[I2C] Could not read controller %s registers: %s", addr, e)
 
-except Exception as e:
-    logger.error(f"[I2C] ✗ Failed to initialize MotorKit at 0x60: {e}")
-    raise
+# Motor boards, opened at the configured I2C clock by the first
+# initialize_motors() call (or the first pump run)
+I2C_FREQUENCY_HZ = None
+i2c_bus = None
+kit = None
+kit2 = None
 
-try:
-    logger.info("[I2C] Initializing MotorKit at address 0x61...")
-    kit2 = MotorKit(address=0x61)
-    logger.info("[I2C] ✓ MotorKit 0x61 initialized successfully")
+# Pump identifier -> (stepper, controller address, stepper number on that board)
+PUMP_TABLE = {}
+
+# PCA9685 registers used to write a stepper's four coil channels in one transfer
+PCA9685_MODE1_AI = 0x20     # MODE1 register auto-increment bit
+PCA9685_LED0_ON_L = 0x06    # LEDn_ON_L for channel 0; 4 registers per channel
+COIL_ON = (0x1000, 0)       # (ON, OFF) counts: full-on bit set
+COIL_OFF = (0, 0x1000)      # (ON, OFF) counts: full-off bit set
+
+class BulkCoilWriter:
+    """
+    Drive a stepper's coils with one I2C write per full step.
 
-    # Verify I2C communication by reading PCA9685 registers
+    MotorKit wires each stepper to four adjacent PCA9685 channels, so all
+    four LEDn_ON/OFF register pairs can be sent as one 17-byte auto-increment
+    write instead of the four separate channel writes StepperMotor.onestep()
+    issues. Steps are SINGLE style (one coil fully on), matching onestep(),
+    and the four possible register blocks are prebuilt.
+    """
+
+    def __init__(self, stpr):
+        coils = stpr._coil  # adafruit_motor order: (ain2, bin1, ain1, bin2)
+        self._pca = coils[0]._pca
+        channels = [coil._index for coil in coils]
+        self._first = min(channels)
+        if sorted(channels) != list(range(self._first, self._first + 4)):
+            raise ValueError(f"coil channels {channels} are not contiguous")
+        self._phase = 0
+
+        # The full register block for each of the four phases, built once
+        start_reg = PCA9685_LED0_ON_L + 4 * self._first
+        self._frames = []
+        for channel in channels:
+            regs = [COIL_OFF] * 4
+            regs[channel - self._first] = COIL_ON
+            self._frames.append(struct.pack('<B8H', start_reg, *regs[0], *regs[1], *regs[2], *regs[3]))
+        self._off_frame = struct.pack('<B8H', start_reg, *(COIL_OFF * 4))
+
+        # Auto-increment is normally set by MotorKit when it sets the PWM frequency
+        mode1 = self._pca.mode1_reg
+        if not mode1 & PCA9685_MODE1_AI:
+            self._pca.mode1_reg = (mode1 & 0x7F) | PCA9685_MODE1_AI
+
+    def onestep(self, *, direction=stepper.FORWARD):
+        """Advance one full step, energising only the next coil in sequence."""
+        self._phase = (self._phase + (1 if direction == stepper.FORWARD else -1)) & 3
+        with self._pca.i2c_device as i2c:
+            i2c.write(self._frames[self._phase])
+
+    def release(self):
+        """De-energise all four coils in one write, like StepperMotor.release()."""
+        with self._pca.i2c_device as i2c:
+            i2c.write(self._off_frame)
+
+def _make_bulk_writer(pumpmat, stpr):
+    """Build a BulkCoilWriter, or None to fall back to StepperMotor.onestep()."""
     try:
-        freq = kit2._pca.frequency
-        prescale = kit2._pca.prescale_reg
-        logger.info(f"[I2C] Controller 0x61 - PWM freq: {freq}Hz, prescale: {prescale}")
-    except Exception as e:
-        logger.warning(f"[I2C] Could not read controller 0x61 registers: {e}")
+        return BulkCoilWriter(stpr)
+    except (AttributeError, IndexError, ValueError) as e:
+        logger.warning("[I2C] Bulk coil writes unavailable for pump %s, using onestep(): %s", pumpmat, e)
+        return None
+
+# Per-pump bulk writers, resolved once so each run reuses the cached channel layout
+BULK_WRITERS = {}
+
+# Held while the boards are opened so concurrent first runs open them once
+_boards_lock = threading.Lock()
+
+def _open_motor_boards(config_path=None):
+    """Open the I2C bus and both MotorKit boards, unless already open."""
+    global I2C_FREQUENCY_HZ, i2c_bus, kit, kit2
+    with _boards_lock:
+        if PUMP_TABLE:
+            return
+
+        # One shared bus for both boards at the configured clock (100kHz is the Blinka default)
+        I2C_FREQUENCY_HZ = _load_i2c_frequency(config_path)
+        i2c_bus = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY_HZ)
+        logger.info("[I2C] Bus opened at %sHz", I2C_FREQUENCY_HZ)
+
+        # Initialize the motor kit with I2C verification
+        try:
+            logger.info("[I2C] Initializing MotorKit at default address 0x60...")
+            kit = MotorKit(i2c=i2c_bus)
+            logger.info("[I2C] ✓ MotorKit 0x60 initialized successfully")
+
+            # Verify I2C communication by reading the PCA9685 prescale register
+            _log_pca_registers('0x60', kit._pca)
 
-except Exception as e:
-    logger.error(f"[I2C] ✗ Failed to initialize MotorKit at 0x61: {e}")
-    raise
+        except Exception as e:
+            logger.error("[I2C] ✗ Failed to initialize MotorKit at 0x60: %s", e)
+            raise
 
-# Define the four possible stepper motors
-STEPPER_A = kit.stepper1
-STEPPER_B = kit.stepper2
-STEPPER_C = kit2.stepper1
-STEPPER_D = kit2.stepper2
+        try:
+            logger.info("[I2C] Initializing MotorKit at address 0x61...")
+            kit2 = MotorKit(address=0x61, i2c=i2c_bus)
+            logger.info("[I2C] ✓ MotorKit 0x61 initialized successfully")
 
-logger.info("[I2C] All stepper motor objects created (A, B, C, D)")
+            # Verify I2C communication by reading the PCA9685 prescale register
+            _log_pca_registers('0x61', kit2._pca)
 
-def initialize_motors():
+        except Exception as e:
+            logger.error("[I2C] ✗ Failed to initialize MotorKit at 0x61: %s", e)
+            raise
+
+        # Define the four possible stepper motors
+        pumps = {
+            'A': (kit.stepper1, '0x60', 1),
+            'B': (kit.stepper2, '0x60', 2),
+            'C': (kit2.stepper1, '0x61', 1),
+            'D': (kit2.stepper2, '0x61', 2),
+        }
+        logger.info("[I2C] All stepper motor objects created (A, B, C, D)")
+
+        for pumpmat, (stpr, _, _) in pumps.items():
+            BULK_WRITERS[pumpmat] = _make_bulk_writer(pumpmat, stpr)
+        # Filled last: a non-empty PUMP_TABLE means the boards are ready
+        PUMP_TABLE.update(pumps)
+
+# Time between full steps (7.4ms -> ~135 steps/sec). The old loop slept 5ms
+# after each I2C write and ran at about this rate, which is the rate the
+# flow_rate_ml_per_second values in pump_profiles.json were calibrated at;
+# a shorter period dispenses proportionally more than the calibrated volume
+STEP_PERIOD = 0.0074
+
+# Stepping style for every pump. DOUBLE (two coils on) gives more torque at
+# twice the coil current; pump flow rates are calibrated for SINGLE, and only
+# SINGLE can use the bulk coil writer
+STEP_STYLE = stepper.SINGLE
+STEP_STYLE_NAME = {stepper.SINGLE: 'SINGLE', stepper.DOUBLE: 'DOUBLE',
+                   stepper.INTERLEAVE: 'INTERLEAVE', stepper.MICROSTEP: 'MICROSTEP'}[STEP_STYLE]
+
+# Display names for log output, keyed by pump identifier
+PUMP_NAMES = {'A': 'Pump A', 'B': 'Pump B', 'C': 'Pump C', 'D': 'Drain Pump'}
+
+def initialize_motors(config_path=None):
     """
-    Release all stepper motors to safe state.
+    Open the motor boards if needed and release all stepper motors to safe state.
     Prevents overheating and reduces power consumption.
+
+    The first call opens the I2C bus at the clock set in config_path
+    (pump_profiles.json, default: repo config/); later calls only release
+    the motors.
+
+    Uses one I2C write per motor where a bulk writer is available. The
+    PCA9685 ALL_LED_OFF register is not used because it would also switch
+    off the PWMA/PWMB enable channels MotorKit holds fully on.
+    """
+    _open_motor_boards(config_path)
+    for pumpmat, (stpr, _, _) in PUMP_TABLE.items():
+        bulk = BULK_WRITERS.get(pumpmat)
+        if bulk is not None:
+            bulk.release()
+        else:
+            stpr.release()
+
+# Background runner for run_stepper_async(); two workers so the drain pump and
+# a fill pump can overlap
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pump')
+
+# One lock per pump so the same motor is never stepped from two threads
+_PUMP_LOCKS = {pumpmat: threading.Lock() for pumpmat in PUMP_NAMES}
+
+def run_stepper_async(pumpmat, direction, usr_time, stop_event=None):
+    """
+    Start run_stepper() on a background thread.
+
+    Returns:
+        concurrent.futures.Future: Resolves when the run finishes; call
+            .result() to wait and re-raise any error
     """
-    STEPPER_A.release()
-    STEPPER_B.release()
-    STEPPER_C.release()
-    STEPPER_D.release()
+    return _executor.submit(run_stepper, pumpmat, direction, usr_time, stop_event)
 
-def run_stepper(pumpmat, direction, usr_time):
+def run_stepper(pumpmat, direction, usr_time, stop_event=None):
     """
     Control stepper motor for pump operations.
 
+    Blocks until the run finishes; use run_stepper_async() to run pumps
+    concurrently. Runs of the same pump are serialized.
+
+    Motors are always released between runs: initialize_motors() runs
+    before the first run and every run releases its own motor on exit, so
+    the other motors are not touched here.
+
     Args:
         pumpmat (str): Pump identifier ('A', 'B', 'C', 'D')
         direction (str): Direction ('F' forward, 'R' reverse)
-        usr_time (int): Duration in seconds
+        usr_time (float): Duration in seconds
+        stop_event (threading.Event): Optional; stops the motor early once set
 
     Raises:
         ValueError: Invalid pump identifier
     """
-    pump_name_map = {'A': 'Pump A', 'B': 'Pump B', 'C': 'Pump C', 'D': 'Drain Pump'}
-    pump_display_name = pump_name_map.get(pumpmat, f'Pump {pumpmat}')
+    if not PUMP_TABLE:
+        initialize_motors()
+    with _PUMP_LOCKS.get(pumpmat, nullcontext()):
+        _run_stepper_blocking(pumpmat, direction, usr_time, stop_event)
+
+def _run_stepper_blocking(pumpmat, direction, usr_time, stop_event):
+    """Body of run_stepper(); the caller holds the pump's lock."""
+    pump_display_name = PUMP_NAMES.get(pumpmat, f'Pump {pumpmat}')
     direction_display = 'FORWARD' if direction == 'F' else 'REVERSE'
 
-    logger.info(f"[PUMP] Starting {pump_display_name} - Direction: {direction_display}, Duration: {usr_time}s")
+    logger.info("[PUMP] Starting %s - Direction: %s, Duration: %ss", pump_display_name, direction_display, usr_time)
 
     # Choose the correct stepper motor based on the input variable
     try:
-        if pumpmat == 'A':
-            stpr = STEPPER_A
-            controller_addr = "0x60"
-            stepper_num = 1
-            STEPPER_B.release()
-            STEPPER_C.release()
-            STEPPER_D.release()
-        elif pumpmat == 'B':
-            stpr = STEPPER_B
-            controller_addr = "0x60"
-            stepper_num = 2
-            STEPPER_A.release()
-            STEPPER_C.release()
-            STEPPER_D.release()
-        elif pumpmat == 'C':
-            stpr = STEPPER_C
-            controller_addr = "0x61"
-            stepper_num = 1
-            STEPPER_A.release()
-            STEPPER_B.release()
-            STEPPER_D.release()
-        elif pumpmat == 'D':
-            stpr = STEPPER_D
-            controller_addr = "0x61"
-            stepper_num = 2
-            STEPPER_A.release()
-            STEPPER_B.release()
-            STEPPER_C.release()
-        else:
-            logger.error(f"[PUMP] ✗ Invalid pump identifier: {pumpmat}")
-            raise ValueError("Invalid stepper number")
+        stpr, controller_addr, stepper_num = PUMP_TABLE[pumpmat]
+    except KeyError:
+        logger.error("[PUMP] ✗ Invalid pump identifier: %s", pumpmat)
+        raise ValueError("Invalid stepper number") from None
 
-        logger.info(f"[I2C] {pump_display_name} mapped to controller {controller_addr}, stepper{stepper_num}")
-        logger.info(f"[I2C] Released all other motors to prevent conflicts")
+    logger.info("[I2C] %s mapped to controller %s, stepper%s", pump_display_name, controller_addr, stepper_num)
 
-    except Exception as e:
-        logger.error(f"[I2C] ✗ Failed to select motor: {e}")
-        raise
-
-    # Set the speed and number of steps for the stepper motor
-    try:
-        stpr.steps = 200
-        stpr.setSpeed = 0.005
-        logger.info(f"[PUMP] Motor configuration: 200 steps, 5ms step delay")
-    except Exception as e:
-        logger.error(f"[I2C] ✗ Failed to configure motor: {e}")
-        raise
+    # Speed is set purely by the step period below; StepperMotor has no speed setting
+    logger.info("[PUMP] Motor configuration: %s steps, %gms step period", STEP_STYLE_NAME, STEP_PERIOD * 1000)
 
     # Run the stepper motor until the desired level is reached
     try:
-        t_start = time.time()
-        t_end = t_start + usr_time
+        n_steps = int(usr_time / STEP_PERIOD)
+        t_start = time.perf_counter()
+        deadline = t_start
         step_count = 0
 
-        logger.info(f"[PUMP] Beginning motor movement...")
-
-        while time.time() < t_end:
-            if direction == 'F':
-                stpr.onestep(direction=stepper.FORWARD)
-                time.sleep(0.005)
-            else:
-                stpr.onestep(direction=stepper.BACKWARD)
-                time.sleep(0.005)
+        logger.info("[PUMP] Beginning motor movement...")
+
+        # One I2C transfer per step where the coil layout allows it
+        bulk = BULK_WRITERS.get(pumpmat) if STEP_STYLE == stepper.SINGLE else None
+        onestep = bulk.onestep if bulk is not None else partial(stpr.onestep, style=STEP_STYLE)
+        step_direction = stepper.FORWARD if direction == 'F' else stepper.BACKWARD
+        # Bound as locals so the loop below avoids global/attribute lookups
+        stopped = stop_event.is_set if stop_event is not None else (lambda: False)
+        perf_counter = time.perf_counter
+        sleep = time.sleep
+        step_period = STEP_PERIOD
+
+        # Each step is due one period after the previous one, so the time spent
+        # on the I2C write comes out of the sleep instead of accumulating. A
+        # late step moves the schedule forward rather than bursting to catch up
+        for _ in range(n_steps):
+            if stopped():
+                logger.warning("[PUMP] %s stopped early", pump_display_name)
+                break
+            onestep(direction=step_direction)  # PERF: one I2C transaction per step
             step_count += 1
+            deadline += step_period
+            now = perf_counter()
+            if deadline > now:
+                sleep(deadline - now)  # PERF: CPU idle between steps
+            else:
+                deadline = now
 
-        actual_duration = time.time() - t_start
+        actual_duration = time.perf_counter() - t_start
         steps_per_second = step_count / actual_duration if actual_duration > 0 else 0
 
-        logger.info(f"[PUMP] ✓ {pump_display_name} completed successfully")
-        logger.info(f"[PUMP] Statistics: {step_count} steps in {actual_duration:.2f}s ({steps_per_second:.1f} steps/sec)")
+        logger.info("[PUMP] ✓ %s completed successfully", pump_display_name)
+        logger.info("[PUMP] Statistics: %d steps in %.2fs (%.1f steps/sec)", step_count, actual_duration, steps_per_second)
 
     except Exception as e:
-        logger.error(f"[I2C] ✗ Motor movement failed: {e}")
+        logger.error("[I2C] ✗ Motor movement failed: %s", e)
         raise
     finally:
         try:
             stpr.release()
-            logger.info(f"[I2C] Motor released to safe state")
+            logger.info("[I2C] Motor released to safe state")
         except Exception as e:
-            logger.error(f"[I2C] ✗ Failed to release motor: {e}")
+            logger.error("[I2C] ✗ Failed to release motor: %s", e)
 
 def run_stepperrev(pumpmat, reqlevel):
-    """Deprecated legacy reverse operation. Prefer run_stepper().
+    """Deprecated: use run_stepper(pumpmat, 'R', seconds).
 
-    Fixed undefined variables (STEPPER_1/2) to use STEPPER_A/B for safety,
-    but function remains for backward compatibility and may be removed.
+    Kept as a shim that reverses pump A or B for 5 seconds, as before;
+    reqlevel is ignored.
     """
-    if pumpmat == 'A':
-        stpr = STEPPER_A
-    elif pumpmat == 'B':
-        stpr = STEPPER_B
-    else:
+    warnings.warn("run_stepperrev() is deprecated; use run_stepper(pumpmat, 'R', seconds)",
+                  DeprecationWarning, stacklevel=2)
+    if pumpmat not in ('A', 'B'):
         raise ValueError("Invalid stepper number (expected 'A' or 'B')")
-
-    stpr.release()
-    stpr.steps = 200
-    # Legacy speed attribute; using small delay loop below
-    t_end = time.time() + 5  # shortened from 180s to 5s for safety if accidentally invoked
-    while time.time() < t_end:
-        stpr.onestep(direction=stepper.BACKWARD)
-        time.sleep(0.005)
-    stpr.release()
+    run_stepper(pumpmat, 'R', 5)
 
 #run_stepper('D', 'F', 30000)
 #run_stepperrev('B', 100)
@@ -37,16 +37,49 @@ import argparse
 import json
 import configparser
 import os
+import re
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
+from functools import lru_cache
 from dataclasses import dataclass
-from typing import Dict, Optional, Any
+from types import MappingProxyType
+from typing import Deque, Dict, Mapping, Optional, Any, Tuple
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Recipe material letters, and the subset served by fill pumps (D is the drain)
+_VALID_MATERIALS = frozenset("ABCD")
+_FILL_PUMP_IDS = frozenset("ABC")
+
+# Printer status values that mean the print has finished
+_COMPLETE_STATES = frozenset(("complete", "finished", "done"))
+
+@lru_cache(maxsize=4)
+def _read_printer_settings(config_file: Optional[Path], mtime_ns: int) -> Mapping[str, Any]:
+    """
+    Parse the [printer] section of network_settings.ini into typed values.
+
+    Cached per file and modification time, so repeated PrintManager
+    construction skips configparser unless the file changed. The result is
+    read-only because it is shared between instances.
+    """
+    config = configparser.ConfigParser()
+    if config_file is not None:
+        config.read(config_file)
+    return MappingProxyType({
+        'ip': config.get('printer', 'ip_address', fallback='192.168.4.2'),
+        'port': config.getint('printer', 'port', fallback=80),
+        'timeout': config.getint('printer', 'timeout', fallback=10),
+    })
+
+# One "material,layer" recipe entry, e.g. "B, 120"
+_RECIPE_PAIR_RE = re.compile(r'\s*([A-Za-z])\s*,\s*(\d+)\s*')
+
 # Import WebSocket IPC system (replaces file-based shared_status)
 try:
     from .websocket_ipc import WebSocketIPCClient
@@ -158,14 +191,15 @@ class PrintManager:
 
         # Configuration
         self.config_path = config_path or self._find_config_path()
-        self.config = self._load_config()
-        self.printer_ip = self.config.get('printer', 'ip_address', fallback='192.168.4.2')
-        self.printer_port = self.config.getint('printer', 'port', fallback=80)
-        self.timeout = self.config.getint('printer', 'timeout', fallback=10)
+        self._printer_cfg = self._load_config()
+        self.printer_ip = self._printer_cfg['ip']
+        self.printer_port = self._printer_cfg['port']
+        self.timeout = self._printer_cfg['timeout']
 
         # State management
         self.state = PrintManagerState.IDLE
         self.recipe: Dict[int, str] = {}
+        self._schedule: Deque[Tuple[int, str]] = deque()  # pending (layer, material), ascending
         self._last_processed_layer: Optional[int] = None
         self._recipe_active = False  # Flag to control recipe-based material changes
 
@@ -177,6 +211,13 @@ class PrintManager:
 
         # Monitoring configuration
         self.poll_interval = 4.0  # seconds between status polls
+        self.min_poll_interval = 0.5  # adaptive polling floor, just before a change
+        self.max_poll_interval = 30.0  # adaptive polling ceiling, between distant changes
+        self.near_change_layers = 5  # within this many layers, poll at least every poll_interval
+        self._layer_mark: Optional[Tuple[int, float]] = None  # (layer, time first seen)
+        self._seconds_per_layer: Optional[float] = None
+        self.status_cache_ttl = 0.5  # seconds a fetched printer status is reused
+        self._status_cache: Optional[Tuple[str, float, Any]] = None  # (ip, monotonic time, status)
         self.log_cycle_frequency = 20  # log every N cycles (reduced frequency)
         self.progress_frequency = 40  # show progress every N cycles (reduced frequency)
 
@@ -222,16 +263,20 @@ class PrintManager:
         config_dir = script_dir.parent.parent / 'config'
         return config_dir
 
-    def _load_config(self) -> configparser.ConfigParser:
-        """Load configuration from INI file."""
-        config = configparser.ConfigParser()
+    def _load_config(self) -> Mapping[str, Any]:
+        """Load the printer settings from network_settings.ini (cached until it changes)."""
         try:
-            config_file = self.config_path / 'network_settings.ini'
-            config.read(config_file)
+            config_file = Path(self.config_path) / 'network_settings.ini'
+            try:
+                mtime_ns = config_file.stat().st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+            settings = _read_printer_settings(config_file, mtime_ns)
             logger.info(f"Loaded configuration from: {config_file}")
+            return settings
         except Exception as e:
             logger.warning(f"Could not load config file: {e} - using defaults")
-        return config
+            return _read_printer_settings(None, 0)
 
     def load_recipe(self, recipe_path: str) -> bool:
         """
@@ -248,63 +293,44 @@ class PrintManager:
         try:
             logger.info(f"Loading recipe: {recipe_path}")
 
-            if not os.path.exists(recipe_path):
+            try:
+                recipe_text = Path(recipe_path).read_text().strip()
+            except FileNotFoundError:
                 logger.error(f"Recipe file does not exist: {recipe_path}")
                 return False
 
-            with open(recipe_path, 'r') as f:
-                recipe_text = f.read().strip()
-
             if not recipe_text:
                 logger.warning("Recipe file is empty")
                 self.recipe = {}
+                self._schedule = deque()
                 return True
 
             # Parse recipe format: "A,50:B,120"
             self.recipe = {}
-            valid_materials = ['A', 'B', 'C', 'D']
-            pairs = recipe_text.split(':')
-
-            for i, pair in enumerate(pairs):
-                if ',' not in pair:
-                    logger.warning(f"Skipping invalid pair (no comma): '{pair}'")
+            for pair in recipe_text.split(':'):
+                match = _RECIPE_PAIR_RE.fullmatch(pair)
+                if match is None:
+                    logger.warning(f"Skipping invalid pair: '{pair}'")
                     continue
 
-                try:
-                    material, layer_str = pair.split(',', 1)
-                    material = material.strip().upper()
-                    layer_str = layer_str.strip()
-
-                    # Validate material
-                    if material not in valid_materials:
-                        logger.error(f"Invalid material '{material}'. Must be one of: {valid_materials}")
-                        continue
-
-                    # Validate layer number
-                    try:
-                        layer = int(layer_str)
-                        if layer <= 0:
-                            logger.error(f"Invalid layer number '{layer}'. Must be positive integer.")
-                            continue
-                    except ValueError:
-                        logger.error(f"Invalid layer number '{layer_str}'. Must be integer.")
-                        continue
-
-                    # Check for duplicate layers
-                    if layer in self.recipe:
-                        logger.warning(f"Duplicate layer {layer}. Overriding {self.recipe[layer]} with {material}")
-
-                    self.recipe[layer] = material
-                    logger.debug(f"Added layer mapping: {layer} -> {material}")
-
-                except Exception as e:
-                    logger.error(f"Failed to parse pair '{pair}': {e}")
+                material = match.group(1).upper()
+                layer = int(match.group(2))
+                if material not in _VALID_MATERIALS:
+                    logger.error(f"Invalid material '{material}'. Must be one of: {sorted(_VALID_MATERIALS)}")
+                    continue
+                if layer <= 0:
+                    logger.error(f"Invalid layer number '{layer}'. Must be positive integer.")
                     continue
 
-            if self.recipe:
-                sorted_layers = sorted(self.recipe.keys())
-                logger.info(f"Successfully loaded {len(self.recipe)} material changes")
-                logger.info(f"Layer range: {min(sorted_layers)} to {max(sorted_layers)}")
+                # Check for duplicate layers
+                if layer in self.recipe:
+                    logger.warning(f"Duplicate layer {layer}. Overriding {self.recipe[layer]} with {material}")
+                self.recipe[layer] = material
+
+            self._schedule = deque(sorted(self.recipe.items()))
+            if self._schedule:
+                logger.info(f"Successfully loaded {len(self._schedule)} material changes")
+                logger.info(f"Layer range: {self._schedule[0][0]} to {self._schedule[-1][0]}")
             else:
                 logger.warning("No valid material changes found in recipe")
 
@@ -427,7 +453,7 @@ class PrintManager:
                 "recipe_count": len(self.recipe),
                 "is_monitoring": self.is_running(),
                 "last_processed_layer": self._last_processed_layer,
-                "remaining_changes": list(sorted(self.recipe.keys()))
+                "remaining_changes": [layer for layer, _ in self._schedule]
             }
 
     def _start_operation(self, operation_name: str):
@@ -444,7 +470,7 @@ class PrintManager:
 
     def _set_pump_status(self, pump_id: str, status: str):
         """Update pump status and broadcast."""
-        pump_key = f"pump_{pump_id.lower()}" if pump_id in ['A', 'B', 'C'] else 'drain_pump'
+        pump_key = f"pump_{pump_id.lower()}" if pump_id in _FILL_PUMP_IDS else 'drain_pump'
         if pump_key in self._pump_states:
             self._pump_states[pump_key] = status
             self._send_operation_status()
@@ -506,8 +532,11 @@ class PrintManager:
             if self.websocket_client and self.websocket_client.is_connected():
                 self._send_websocket_status_update(tag, message, data, level)
             else:
-                # WebSocket not available - log locally only
-                logger.debug(f"[{tag}] {message}" + (f" | Data: {data}" if data else ""))
+                # WebSocket not available - log locally only. Called every
+                # monitoring cycle, so skip formatting the data dict unless
+                # debug logging is actually on.
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[%s] %s%s", tag, message, f" | Data: {data}" if data else "")
 
         except queue.Full:
             logger.warning("Status queue full - dropping update")
@@ -516,7 +545,7 @@ class PrintManager:
         """Legacy method - now handled by WebSocket IPC system."""
         # This method is now deprecated as status updates are handled
         # directly via WebSocket in _send_status_update()
-        logger.debug(f"Legacy shared_status call for {tag}: {message}")
+        logger.debug("Legacy shared_status call for %s: %s", tag, message)
 
     def _handle_websocket_command(self, command_data: Dict[str, Any]):
         """Handle commands received via WebSocket IPC."""
@@ -592,10 +621,13 @@ class PrintManager:
 
             # Clean startup message
             self._send_status_update("EXPERIMENT", f"Multi-material experiment started",
-                                   {"recipe": dict(sorted(self.recipe.items())), "printer_ip": self.printer_ip})
+                                   {"recipe": dict(self._schedule), "printer_ip": self.printer_ip})
 
             loop_count = 0
             last_layer_logged = None
+            previous_layer = None
+            self._layer_mark = None
+            self._seconds_per_layer = None
 
             while not self._stop_event.is_set():
                 loop_count += 1
@@ -606,17 +638,7 @@ class PrintManager:
                     # Process any queued commands from WebSocket
                     command = self.websocket_client.get_next_command(timeout=0.1)
                     if command:
-                        command_dict = {
-                            "command": command['command_type'],
-                            "parameters": command.get('parameters', {}),
-                            "command_id": command.get('command_id')
-                        }
-                        success = self._process_shared_command(command_dict)
-                        self.websocket_client.mark_command_processed(
-                            command['command_id'],
-                            success=success,
-                            result="Command executed" if success else "Command failed"
-                        )
+                        self._handle_websocket_command(command)
                 else:
                     # No WebSocket connection available - log warning
                     if loop_count % 60 == 0:  # Log every 5 minutes (60 * 5s intervals)
@@ -635,7 +657,7 @@ class PrintManager:
                     # Update shared status for printer disconnection
                     self._send_status_update("PRINTER_STATUS", "Printer disconnected",
                                            {"printer_connected": False, "printer_status": "Disconnected"}, "warning")
-                    if not self._stop_event.wait(self.poll_interval):
+                    if not self._wait_for_next_poll(self.poll_interval):
                         continue
                     break
 
@@ -653,7 +675,7 @@ class PrintManager:
                 # Extract current layer
                 current_layer = self._extract_current_layer(status)
                 if current_layer is None:
-                    if not self._stop_event.wait(self.poll_interval):
+                    if not self._wait_for_next_poll(self.poll_interval):
                         continue
                     break
 
@@ -687,9 +709,28 @@ class PrintManager:
                     # Still update shared status even if not logging
                     self._send_status_update("MONITOR", "Layer monitoring update", layer_data)
 
-                # Check for material changes (only if recipe is active)
-                if self._recipe_active and current_layer in self.recipe and current_layer != self._last_processed_layer:
-                    material = self.recipe[current_layer]
+                # Check for material changes (only if recipe is active). Layers
+                # passed since the previous poll are still due, so a poll that
+                # skips past a target layer still makes the change. Layers the
+                # printer had already passed before that (monitoring started or
+                # recipe loaded mid-print) are dropped rather than run at once.
+                if previous_layer is None or previous_layer >= current_layer:
+                    first_due_layer = current_layer
+                else:
+                    first_due_layer = previous_layer + 1
+                previous_layer = current_layer
+                while self._recipe_active and self._schedule and self._schedule[0][0] < first_due_layer:
+                    missed_layer, missed_material = self._schedule.popleft()
+                    logger.warning(f"Change at layer {missed_layer} (Material {missed_material}) missed - printer already at layer {current_layer}")
+                    self.recipe.pop(missed_layer, None)
+
+                if self._recipe_active and self._schedule and self._schedule[0][0] <= current_layer:
+                    target_layer, material = self._schedule.popleft()
+                    while self._schedule and self._schedule[0][0] <= current_layer:
+                        logger.warning(f"Change at layer {target_layer} (Material {material}) superseded by layer {self._schedule[0][0]}")
+                        self.recipe.pop(target_layer, None)
+                        target_layer, material = self._schedule.popleft()
+                    self.recipe.pop(target_layer, None)
                     self._material_change_count += 1
 
                     change_start = time.time()
@@ -700,20 +741,19 @@ class PrintManager:
                         self.state = PrintManagerState.MATERIAL_CHANGING
 
                     if self._handle_material_change(material):
-                        # Mark processed and remove from recipe
+                        # Mark processed (already removed from the schedule)
                         self._last_processed_layer = current_layer
-                        del self.recipe[current_layer]
 
                         change_duration = time.time() - change_start
-                        remaining = len(self.recipe)
+                        remaining = len(self._schedule)
 
                         self._send_status_update("MATERIAL", f"Change #{self._material_change_count} completed in {change_duration:.1f}s",
                                                {"material": material, "duration_seconds": round(change_duration, 1), "remaining_changes": remaining})
 
                         if remaining > 0:
-                            next_layer = min(self.recipe.keys())
-                            self._send_status_update("MATERIAL", f"Next change: Layer {next_layer} (Material {self.recipe[next_layer]})",
-                                                   {"next_layer": next_layer, "next_material": self.recipe[next_layer]})
+                            next_layer, next_material = self._schedule[0]
+                            self._send_status_update("MATERIAL", f"Next change: Layer {next_layer} (Material {next_material})",
+                                                   {"next_layer": next_layer, "next_material": next_material})
                     else:
                         self._send_status_update("MATERIAL", f"Change #{self._material_change_count} FAILED", level="error")
                         self._last_processed_layer = current_layer
@@ -721,6 +761,9 @@ class PrintManager:
                     with self._state_lock:
                         self.state = PrintManagerState.MONITORING
 
+                    # The pause would inflate the next layer-time measurement
+                    self._layer_mark = None
+
                 # Check if print is complete
                 if self._is_print_complete(status):
                     total_time = time.time() - self._experiment_start_time
@@ -729,7 +772,7 @@ class PrintManager:
                     break
 
                 # Wait for next cycle or stop signal
-                if self._stop_event.wait(self.poll_interval):
+                if self._wait_for_next_poll(self._next_poll_interval(current_layer)):
                     break
 
         except Exception as e:
@@ -750,14 +793,89 @@ class PrintManager:
                 if self.state != PrintManagerState.ERROR:
                     self.state = PrintManagerState.IDLE
 
+    def _handle_websocket_command(self, command: Dict[str, Any]) -> None:
+        """Run one queued WebSocket command and report the result back."""
+        command_dict = {
+            "command": command['command_type'],
+            "parameters": command.get('parameters', {}),
+            "command_id": command.get('command_id')
+        }
+        success = self._process_shared_command(command_dict)
+        self.websocket_client.mark_command_processed(
+            command['command_id'],
+            success=success,
+            result="Command executed" if success else "Command failed"
+        )
+
+    def _wait_for_next_poll(self, seconds: float) -> bool:
+        """
+        Wait up to seconds for the next status poll; True if stop was requested.
+
+        While a WebSocket connection is up the wait blocks on its command queue,
+        so UI commands are handled as they arrive rather than after a long
+        adaptive poll interval.
+        """
+        deadline = time.monotonic() + seconds
+        while not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.websocket_client and self.websocket_client.is_connected():
+                # Short slices so a stop request is still seen promptly
+                command = self.websocket_client.get_next_command(timeout=min(remaining, 0.5))
+                if command:
+                    self._handle_websocket_command(command)
+            elif self._stop_event.wait(remaining):
+                break
+        return True
+
+    def _next_poll_interval(self, current_layer: int) -> float:
+        """
+        Seconds to wait before the next status poll.
+
+        Polls quickly as the next recipe layer approaches and backs off while it
+        is many layers away, based on the measured time per layer. Falls back to
+        poll_interval until a layer time has been measured or when no change is
+        pending. Within near_change_layers of a change it never waits longer
+        than poll_interval, since a time per layer measured on the slow bottom
+        layers overestimates the later ones.
+        """
+        now = time.time()
+        mark = self._layer_mark
+        if mark is None or current_layer < mark[0]:
+            self._layer_mark = (current_layer, now)
+        elif current_layer > mark[0]:
+            self._seconds_per_layer = (now - mark[1]) / (current_layer - mark[0])
+            self._layer_mark = (current_layer, now)
+
+        if not self._recipe_active or not self._schedule or self._seconds_per_layer is None:
+            return self.poll_interval
+
+        layers_until_next = self._schedule[0][0] - current_layer
+        if layers_until_next <= self.near_change_layers:
+            # Aim to wake on the layer before the change
+            interval = self._seconds_per_layer * (layers_until_next - 1)
+            return min(max(interval, self.min_poll_interval), self.poll_interval)
+
+        # Far away: back off only until the change is near_change_layers out
+        interval = self._seconds_per_layer * (layers_until_next - self.near_change_layers)
+        return min(max(interval, self.min_poll_interval), self.max_poll_interval)
+
     def _get_printer_status(self):
-        """Get current printer status via uart-wifi."""
+        """Get current printer status via uart-wifi, reusing one fetched within status_cache_ttl."""
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached is not None and cached[0] == self.printer_ip and now - cached[1] < self.status_cache_ttl:
+            return cached[2]
         try:
             if printer_comms is None:
                 return None
-            return printer_comms.get_status(self.printer_ip)
+            status = printer_comms.get_status(self.printer_ip)
         except Exception as e:
             return None
+        if status is not None:
+            self._status_cache = (self.printer_ip, now, status)
+        return status
 
     def _extract_current_layer(self, status) -> Optional[int]:
         """
@@ -799,10 +917,15 @@ class PrintManager:
                 self._end_operation()
                 return False
 
-            # Step 2: Wait for bed to rise
+            # Step 2: Wait for bed to rise. The MMU controller and pump driver
+            # are brought up meanwhile; no pump may run until the bed is clear.
             self._start_operation("Waiting for bed to raise")
             self._send_status_update("TIMING", "Step 2: Waiting for bed to reach raised position...")
-            self._wait_for_bed_raised()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                warm_up = executor.submit(mmu_control.prepare_controller) if mmu_control is not None else None
+                self._wait_for_bed_raised()
+                if warm_up is not None and warm_up.exception() is not None:
+                    logger.warning(f"MMU controller warm-up failed: {warm_up.exception()}")
 
             # Step 3: Execute material change
             self._start_operation(f"Material change to {material}")
@@ -860,6 +983,7 @@ class PrintManager:
                 return False
             success = printer_comms.pause_print(self.printer_ip)
             if success:
+                self._status_cache = None
                 # Establish quiescent window to prevent race conditions where subsequent
                 # commands interfere with firmware pause sequence.
                 # Read from config file, fallback to env var, then default
@@ -893,6 +1017,7 @@ class PrintManager:
                     pass
             success = printer_comms.resume_print(self.printer_ip)
             if success:
+                self._status_cache = None
                 # Clear quiescent window on successful resume
                 self._quiescent_until = 0.0
             return success
@@ -936,12 +1061,14 @@ class PrintManager:
         # Extended wait for mechanical bed movement
         self._send_status_update("TIMING", f"Bed positioning: {bed_raise_time}s mechanical movement...")
 
-        for i in range(bed_raise_time):
-            if self._stop_event.wait(1.0):  # Respect stop signal
+        # Wake only at the 5-second progress points, then wait out the remainder
+        elapsed = 0
+        for elapsed in range(5, bed_raise_time + 1, 5):
+            if self._stop_event.wait(5.0):  # Respect stop signal
                 return
-
-            if (i + 1) % 5 == 0:  # Progress update every 5 seconds
-                self._send_status_update("TIMING", f"Bed positioning: {i + 1}/{bed_raise_time}s elapsed")
+            self._send_status_update("TIMING", f"Bed positioning: {elapsed}/{bed_raise_time}s elapsed")
+        if elapsed < bed_raise_time and self._stop_event.wait(bed_raise_time - elapsed):
+            return
 
         # Verify printer is still paused
         status = self._get_printer_status()
@@ -963,28 +1090,23 @@ class PrintManager:
         try:
             # Handle MonoXStatus object
             if hasattr(status, 'status'):
-                printer_status = status.status
+                printer_status = status.status.lower()
                 percent = getattr(status, 'percent_complete', 0)
-                current_layer = getattr(status, 'current_layer', 0)
-                total_layers = getattr(status, 'total_layers', 0)
 
                 # Print is complete if status is specifically "complete" or "finished"
-                if printer_status.lower() in ['complete', 'finished', 'done']:
+                if printer_status in _COMPLETE_STATES:
                     return True
 
-                if printer_status.lower() == 'stop' and percent >= 100:
+                if printer_status == 'stop' and percent >= 100:
                     return True
 
+                current_layer = getattr(status, 'current_layer', 0)
+                total_layers = getattr(status, 'total_layers', 0)
                 if total_layers > 0 and current_layer >= total_layers and percent >= 99:
                     return True
 
-                # Print is NOT complete if actively printing
-                if printer_status.lower() in ['print', 'printing']:
-                    return False
-
-                # Print is NOT complete if stopped but not at end
-                if printer_status.lower() == 'stop' and percent < 100:
-                    return False
+                # The string fallback below only repeats the status check above
+                return False
 
             # Fallback to string checking
             status_str = str(status).lower()
@@ -1359,7 +1481,6 @@ class PrintManager:
                 self._send_status_update("DIAGNOSTICS", "Pump configuration file not found", level="error")
                 return False
 
-            import json
             with open(config_path, 'r') as f:
                 config = json.load(f)
 
@@ -1517,8 +1638,6 @@ def main():
 
     Demonstrates usage and provides CLI access for testing.
     """
-    import sys
-
     # Configure clean logging for GUI integration
     logging.basicConfig(
         level=logging.INFO,
@@ -23,6 +23,7 @@ Requires: uart-wifi>=0.2.1, network_settings.ini configuration
 import configparser
 from pathlib import Path
 import logging
+import time
 
 # Import uart-wifi library for printer communication
 try:
@@ -66,6 +67,7 @@ class PrinterCommunicator:
         self.printer_port = self.config.getint('printer', 'port', fallback=6000)
         self.timeout = self.config.getint('printer', 'timeout', fallback=10)
         self._uart_wifi = None
+        self._uart_address = None
         
     def _find_config_path(self):
         """Find network configuration file path."""
@@ -83,9 +85,11 @@ class PrinterCommunicator:
         return config
     
     def _get_uart_connection(self):
-        """Get or create uart-wifi connection instance."""
-        if self._uart_wifi is None:
-            self._uart_wifi = UartWifi(self.printer_ip, self.printer_port)
+        """Get or create the uart-wifi instance for the current printer address."""
+        address = (self.printer_ip, self.printer_port)
+        if self._uart_wifi is None or self._uart_address != address:
+            self._uart_wifi = UartWifi(*address)
+            self._uart_address = address
         return self._uart_wifi
         
     def _run_printer_command(self, command):
@@ -98,16 +102,13 @@ class PrinterCommunicator:
         Returns:
             Response object or None if failed
         """
-        import time
-
         if not UART_WIFI_AVAILABLE:
             return None
 
         # Try 3 times to get the data (matching original behavior)
         for attempt in range(3):
             try:
-                uart = UartWifi(self.printer_ip, self.printer_port)
-                responses = uart.send_request(command)
+                responses = self._get_uart_connection().send_request(command)
                 return responses[0] if responses else None  # Return the primary response object
             except ConnectionException:
                 time.sleep(1)